@@ -0,0 +1,186 @@
+import json
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+from logic import *
+
+USAGE = ("Usage: python batch.py solve puzzles.jsonl [processes]\n"
+         "       python batch.py generate characters count [seed]")
+
+# Operators used when generating random statements
+CONNECTIVES = ["∧", "∨", "=>", "<=>"]
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("solve", "generate"):
+        sys.exit(USAGE)
+
+    if sys.argv[1] == "solve":
+        if len(sys.argv) not in (3, 4):
+            sys.exit(USAGE)
+        processes = int(sys.argv[3]) if len(sys.argv) == 4 else None
+        with open(sys.argv[2], encoding="utf-8") as f:
+            specs = [json.loads(line) for line in f if line.strip()]
+        for result in solve_all(specs, processes):
+            print(json.dumps(result, ensure_ascii=False))
+    else:
+        if len(sys.argv) not in (4, 5):
+            sys.exit(USAGE)
+        rng = random.Random(int(sys.argv[4]) if len(sys.argv) == 5 else None)
+        for i in range(int(sys.argv[3])):
+            spec = generate(int(sys.argv[2]), rng)
+            spec["name"] = f"Puzzle {i}"
+            print(json.dumps(spec, ensure_ascii=False))
+
+
+def knowledge_of(spec):
+    """
+    Build the knowledge base of a puzzle spec.
+
+    A spec is a dictionary with a list of "characters" and a list of
+    "statements", each a [speaker, formula] pair. Formulas use the syntax
+    of Sentence.formula(), where a character's name stands for
+    "<name> is a Knight". Returns the knowledge base and, for each
+    character, its (knight, knave) symbols. Raises ValueError if a
+    speaker or a name in a formula is not one of the characters.
+    """
+    characters = {
+        name: (Symbol(f"{name} is a Knight"), Symbol(f"{name} is a Knave"))
+        for name in spec["characters"]
+    }
+    knowledge = And()
+    for knight, knave in characters.values():
+
+        # Everyone is either Knight or Knave
+        knowledge.add(And(Or(knight, knave), Not(And(knight, knave))))
+
+    # A knight's statement is true, a knave's statement is false
+    names = {name: knight for name, (knight, _) in characters.items()}
+    for speaker, statement in spec["statements"]:
+        if speaker not in characters:
+            raise ValueError(f"unknown speaker {speaker!r}")
+        symbols = dict(names)
+        sentence = parse(statement, symbols)
+
+        # parse adds a new symbol for any name it was not given
+        unknown = symbols.keys() - names.keys()
+        if unknown:
+            raise ValueError(
+                f"unknown character {min(unknown)!r} in {statement!r}")
+        knowledge.add(Biconditional(characters[speaker][0], sentence))
+    return knowledge, characters
+
+
+def solve(spec):
+    """
+    Solve a single puzzle spec. Each character is reported as
+    "Knight", "Knave", or None if the knowledge does not decide it.
+    """
+    start = time.perf_counter()
+    knowledge, characters = knowledge_of(spec)
+    solution = dict()
+    for name, (knight, knave) in characters.items():
+        if model_check(knowledge, knight):
+            solution[name] = "Knight"
+        elif model_check(knowledge, knave):
+            solution[name] = "Knave"
+        else:
+            solution[name] = None
+    return {
+        "name": spec.get("name"),
+        "solution": solution,
+        "seconds": time.perf_counter() - start
+    }
+
+
+def solve_all(specs, processes=None):
+    """
+    Solve puzzle specs in a pool of worker processes,
+    yielding results in the order of `specs`.
+    """
+    with Pool(processes) as pool:
+        yield from pool.imap(solve, specs)
+
+
+def random_statement(names, rng, depth):
+    """Return a random formula over character names, nested up to `depth`."""
+    if depth == 0 or rng.random() < 0.3:
+        name = rng.choice(names)
+        return name if rng.random() < 0.5 else f"¬{name}"
+    left = Sentence.parenthesize(random_statement(names, rng, depth - 1))
+    right = Sentence.parenthesize(random_statement(names, rng, depth - 1))
+    return f"{left} {rng.choice(CONNECTIVES)} {right}"
+
+
+def is_unique(names, statements, knights):
+    """
+    Return True if `knights`, mapping each name to whether they are a
+    knight, is the only assignment under which every (speaker, sentence)
+    in `statements` is true exactly when its speaker is a knight.
+
+    Since everyone is either a knight or a knave, this walks the 2^N
+    assignments of knights alone, in Gray-code order as in model_check,
+    re-evaluating only the statements that mention the flipped name.
+    """
+    keys = [f"{name} is a Knight" for name in names]
+    hidden = dict(zip(keys, (knights[name] for name in names)))
+    model = dict.fromkeys(keys, False)
+    affected = {key: [] for key in keys}
+    for i, (speaker, sentence) in enumerate(statements):
+        for key in sentence.symbols() | {f"{speaker} is a Knight"}:
+            affected[key].append(i)
+
+    def holds(i):
+        speaker, sentence = statements[i]
+        return sentence.evaluate(model) == model[f"{speaker} is a Knight"]
+
+    values = [holds(i) for i in range(len(statements))]
+    failing = values.count(False)
+    step = 0
+    while True:
+        if failing == 0 and model != hidden:
+            return False
+        step += 1
+        if step >> len(keys):
+            return True
+        key = keys[(step & -step).bit_length() - 1]
+        model[key] = not model[key]
+        for i in affected[key]:
+            value = holds(i)
+            if value != values[i]:
+                failing += -1 if value else 1
+                values[i] = value
+
+
+def generate(n, rng=random, depth=2, attempts=100):
+    """
+    Generate a random puzzle with `n` characters whose solution is unique.
+
+    A hidden assignment of knights and knaves is drawn first, and every
+    statement is negated where needed so it is true exactly when its
+    speaker is a knight; puzzles that leave someone undecided (that is,
+    with any other assignment consistent with the statements) are retried.
+    """
+    names = [chr(ord("A") + i) if i < 26 else f"P{i}" for i in range(n)]
+    symbols = {name: Symbol(f"{name} is a Knight") for name in names}
+    for _ in range(attempts):
+        knights = {name: rng.random() < 0.5 for name in names}
+        model = {f"{name} is a Knight": knights[name] for name in names}
+        statements, sentences = [], []
+        for speaker in names:
+            statement = random_statement(names, rng, depth)
+            sentence = parse(statement, symbols)
+            if sentence.evaluate(model) != knights[speaker]:
+                statement = "¬" + Sentence.parenthesize(statement)
+                sentence = Not(sentence)
+            statements.append([speaker, statement])
+            sentences.append((speaker, sentence))
+        if is_unique(names, sentences, knights):
+            return {"characters": names, "statements": statements}
+    raise ValueError(f"no uniquely solvable puzzle found in {attempts} attempts")
+
+
+if __name__ == "__main__":
+    main()
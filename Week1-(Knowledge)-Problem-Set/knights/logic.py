@@ -1,4 +1,5 @@
 import itertools
+import re
 
 
 class Sentence():
@@ -217,47 +218,180 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+def conjuncts_of(sentence):
+    """
+    Flattens nested conjunctions into a list of their non-And conjuncts,
+    so each one can be re-evaluated independently of the others.
+    """
+    if isinstance(sentence, And):
+        flat = []
+        for conjunct in sentence.conjuncts:
+            flat.extend(conjuncts_of(conjunct))
+        return flat
+    return [sentence]
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Split knowledge into conjuncts and index them by the symbols they use,
+    # so that flipping a symbol only re-evaluates the affected conjuncts
+    conjuncts = conjuncts_of(knowledge)
+    affected = {symbol: [] for symbol in symbols}
+    for i, conjunct in enumerate(conjuncts):
+        for symbol in conjunct.symbols():
+            affected[symbol].append(i)
+    in_query = {symbol: False for symbol in symbols}
+    for symbol in query.symbols():
+        in_query[symbol] = True
+
+    # Start from the model where every symbol is false
+    model = dict.fromkeys(symbols, False)
+    values = [conjunct.evaluate(model) for conjunct in conjuncts]
+    falsified = values.count(False)
+    query_value = query.evaluate(model)
+
+    # Walk the remaining models in Gray-code order, flipping one symbol
+    # per step in the single shared model
+    step = 0
+    while True:
+
+        # If knowledge base is true in model, then query must also be true
+        if falsified == 0 and not query_value:
+            return False
+
+        step += 1
+        if step >> len(symbols):
+            return True
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+        # The symbol to flip is given by the lowest set bit of the step
+        p = symbols[(step & -step).bit_length() - 1]
+        model[p] = not model[p]
+
+        for i in affected[p]:
+            value = conjuncts[i].evaluate(model)
+            if value != values[i]:
+                falsified += -1 if value else 1
+                values[i] = value
+        if in_query[p]:
+            query_value = query.evaluate(model)
+
+
+# Tokens of the syntax produced by Sentence.formula(); symbol names are
+# anything between operators and parentheses, so they may contain spaces
+TOKENS = re.compile(r"\s*(<=>|=>|[¬∧∨()]|[^¬∧∨()<=]+)")
+
+
+def parse(text, symbols=None):
+    """
+    Parses a formula, in the syntax produced by Sentence.formula(),
+    back into a Sentence. Binding from tightest to loosest is
+    ¬, ∧, ∨, =>, <=>. `symbols` optionally maps names to Symbols
+    already created, so that repeated names share one object.
+    """
+    if symbols is None:
+        symbols = dict()
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKENS.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected character at {position}: {text!r}")
+        tokens.append(match.group(1).strip())
+        position = match.end()
+    tokens.append(None)
+    index = 0
+
+    def peek():
+        return tokens[index]
+
+    def advance():
+        nonlocal index
+        token = tokens[index]
+        index += 1
+        return token
+
+    def binary(operand, operator, build):
+        """Parses `operand (operator operand)*` and combines with `build`."""
+        operands = [operand()]
+        while peek() == operator:
+            advance()
+            operands.append(operand())
+        return operands[0] if len(operands) == 1 else build(operands)
+
+    def biconditional():
+        left = implication()
+        if peek() == "<=>":
+            advance()
+            return Biconditional(left, biconditional())
+        return left
+
+    def implication():
+        antecedent = disjunction()
+        if peek() == "=>":
+            advance()
+            return Implication(antecedent, implication())
+        return antecedent
+
+    def disjunction():
+        return binary(conjunction, "∨", lambda operands: Or(*operands))
+
+    def conjunction():
+        return binary(negation, "∧", lambda operands: And(*operands))
+
+    def negation():
+        token = advance()
+        if token == "¬":
+            return Not(negation())
+        if token == "(":
+            sentence = biconditional()
+            if advance() != ")":
+                raise ValueError(f"expected ')' in {text!r}")
+            return sentence
+        if token is None or token in ("∧", "∨", "=>", "<=>", ")"):
+            raise ValueError(f"expected a symbol, got {token!r} in {text!r}")
+        if token not in symbols:
+            symbols[token] = Symbol(token)
+        return symbols[token]
+
+    sentence = biconditional()
+    if peek() is not None:
+        raise ValueError(f"unexpected {peek()!r} in {text!r}")
+    return sentence
+
+
+def parse_lines(lines, symbols=None):
+    """
+    Lazily parses one sentence per line, skipping blank lines
+    and lines starting with '#'.
+    """
+    if symbols is None:
+        symbols = dict()
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield parse(line, symbols)
+
+
+def load_knowledge(filename):
+    """
+    Streams a file of formulas, one per line, into a single
+    knowledge base that is the conjunction of all of them.
+    """
+    knowledge = And()
+    with open(filename, encoding="utf-8") as f:
+        for sentence in parse_lines(f):
+            knowledge.add(sentence)
+    return knowledge
@@ -1,20 +1,37 @@
+import functools
 import itertools
+import operator
+from collections import deque
 from mimetypes import knownfiles
 import random
 
+# Components with more cells than this are not enumerated exactly
+MAX_COMPONENT_CELLS = 40
+
+# Assumed share of unknown cells that are mines, if the total is not given
+DEFAULT_DENSITY = 0.15
+
 
 class Minesweeper():
     """
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    def __init__(self, height=8, width=8, mines=8, vectorized=False):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
         self.mines = set()
 
+        # Precomputed counts of nearby mines, only kept by vectorized boards
+        self.counts = None
+
+        if vectorized:
+            self.place_mines_vectorized(mines)
+            self.mines_found = set()
+            return
+
         # Initialize an empty field with no mines
         self.board = []
         for i in range(self.height):
@@ -34,6 +51,33 @@ class Minesweeper():
         # At first, player has found no mines
         self.mines_found = set()
 
+    def place_mines_vectorized(self, mines):
+        """
+        Builds the board as a NumPy array, placing all mines with a single
+        sample without replacement and counting every cell's nearby mines
+        at once with a 3x3 convolution, so nearby_mines is a lookup.
+        """
+        import numpy as np
+
+        # Seed from `random` so random.seed still reproduces boards
+        rng = np.random.default_rng(random.getrandbits(64))
+        positions = rng.choice(self.height * self.width, size=mines,
+                               replace=False)
+        self.board = np.zeros(self.height * self.width, dtype=bool)
+        self.board[positions] = True
+        self.board = self.board.reshape(self.height, self.width)
+        self.mines = set(zip((positions // self.width).tolist(),
+                             (positions % self.width).tolist()))
+
+        # Sum the 8 shifted copies of the padded board around each cell
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        self.counts = np.zeros((self.height, self.width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.counts += padded[di:di + self.height,
+                                          dj:dj + self.width]
+
     def print(self):
         """
         Prints a text-based representation
@@ -51,7 +95,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.board[i][j])
 
     def nearby_mines(self, cell):
         """
@@ -59,6 +103,8 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
+        if self.counts is not None:
+            return int(self.counts[cell])
 
         # Keep count of nearby mines
         count = 0
@@ -78,6 +124,28 @@ class Minesweeper():
 
         return count
 
+    def reveal(self, cell):
+        """
+        Reveals a safe cell and, if it has no nearby mines, the whole
+        region reachable through cells with no nearby mines, breadth first.
+        Returns a dictionary mapping each revealed cell to its number
+        of nearby mines.
+        """
+        revealed = {cell: self.nearby_mines(cell)}
+        queue = deque([cell])
+        while queue:
+            i, j = queue.popleft()
+            if revealed[(i, j)] != 0:
+                continue
+
+            # No neighbor of a cell without nearby mines is a mine
+            for ni in range(max(0, i - 1), min(i + 2, self.height)):
+                for nj in range(max(0, j - 1), min(j + 2, self.width)):
+                    if (ni, nj) not in revealed:
+                        revealed[(ni, nj)] = self.nearby_mines((ni, nj))
+                        queue.append((ni, nj))
+        return revealed
+
     def won(self):
         """
         Checks if all mines have been flagged.
@@ -133,16 +201,131 @@ class Sentence():
         if cell in self.cells:
             self.cells.remove(cell)
 
+
+def bits_of(mask):
+    """
+    Yields the single-bit masks of the bits set in `mask`.
+    """
+    while mask:
+        low = mask & -mask
+        yield low
+        mask ^= low
+
+
+class BitSentence():
+    """
+    Logical statement about a Minesweeper game, with its cells stored
+    as the set bits of an integer mask over the board, so that subset
+    tests and differences between sentences are single integer operations.
+    """
+
+    __slots__ = ("cells", "count")
+
+    def __init__(self, cells, count):
+        self.cells = cells
+        self.count = count
+
+    def __str__(self):
+        return f"{bin(self.cells)} = {self.count}"
+
+    def size(self):
+        """
+        Returns the number of cells in the sentence.
+        """
+        return self.cells.bit_count()
+
+    def known_mines(self):
+        """
+        Returns the mask of all cells in self.cells known to be mines.
+        """
+        return self.cells if self.size() <= self.count else 0
+
+    def known_safes(self):
+        """
+        Returns the mask of all cells in self.cells known to be safe.
+        """
+        return self.cells if self.count == 0 else 0
+
+    def mark_mine(self, bit):
+        """
+        Updates the sentence given that the cell with mask `bit`
+        is known to be a mine.
+        """
+        if self.cells & bit:
+            self.cells &= ~bit
+            if self.count > 0:
+                self.count -= 1
+
+    def mark_safe(self, bit):
+        """
+        Updates the sentence given that the cell with mask `bit`
+        is known to be safe.
+        """
+        self.cells &= ~bit
+
+
+def count_assignments(sentences):
+    """
+    Enumerates, by backtracking, the mine assignments to the cells of
+    `sentences` (pairs of cell mask and count) that satisfy all of them.
+
+    Returns the list of cell bits and a dictionary mapping each number of
+    mines k to [number of assignments with k mines, list of how many of
+    those assignments put a mine in each cell].
+    """
+    cells = list(bits_of(functools.reduce(operator.or_,
+                                          (c for c, _ in sentences), 0)))
+    position = {bit: i for i, bit in enumerate(cells)}
+    containing = [[] for _ in cells]
+    remaining_mines = []
+    remaining_cells = []
+    for s, (mask, count) in enumerate(sentences):
+        for bit in bits_of(mask):
+            containing[position[bit]].append(s)
+        remaining_mines.append(count)
+        remaining_cells.append(mask.bit_count())
+
+    results = dict()
+    assignment = [0] * len(cells)
+
+    def assign(i, mines):
+        if i == len(cells):
+            total = results.setdefault(mines, [0, [0] * len(cells)])
+            total[0] += 1
+            for j, mine in enumerate(assignment):
+                total[1][j] += mine
+            return
+        for mine in (0, 1):
+
+            # Every sentence of the cell must stay satisfiable
+            if all(remaining_mines[s] >= mine and
+                   remaining_mines[s] - mine <= remaining_cells[s] - 1
+                   for s in containing[i]):
+                for s in containing[i]:
+                    remaining_mines[s] -= mine
+                    remaining_cells[s] -= 1
+                assignment[i] = mine
+                assign(i + 1, mines + mine)
+                for s in containing[i]:
+                    remaining_mines[s] += mine
+                    remaining_cells[s] += 1
+        assignment[i] = 0
+
+    assign(0, 0)
+    return cells, results
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(self, height=8, width=8, mines=None):
 
-        # Set initial height and width
+        # Set initial height and width, and total mines if known
         self.height = height
         self.width = width
+        self.total_mines = mines
 
         # Keep track of which cells have been clicked on
         self.moves_made = set()
@@ -151,26 +334,157 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Cells neither chosen nor known to be mines, with the position of
+        # each in the list so that it can be removed in constant time
+        self.unknown = [(i, j) for i in range(height) for j in range(width)]
+        self.unknown_position = {
+            cell: position for position, cell in enumerate(self.unknown)
+        }
+
+        # Cells known to be safe that have not been chosen yet
+        self.pending_safes = set()
+
+        # Sentences about the game known to be true, keyed by their cells
+        # stored as bitmasks (see `bit`), so each set of cells appears once
+        self.knowledge = dict()
+
+        # Sentences containing each cell, keyed by the cell's bit
+        self.index = dict()
+
+        # Sentences added or changed since inference last looked at them
+        self.worklist = deque()
+
+        # Assignment counts of the frontier components seen on the last
+        # move, keyed by the component's sentences
+        self.components = dict()
+
+    def bit(self, cell):
+        """
+        Returns the mask of a single cell, numbering cells row by row.
+        """
+        return 1 << (cell[0] * self.width + cell[1])
+
+    def cells_of(self, mask):
+        """
+        Yields the cells whose bits are set in `mask`.
+        """
+        for bit in bits_of(mask):
+            yield divmod(bit.bit_length() - 1, self.width)
+
+    def record_move(self, cell):
+        """
+        Marks a cell as a move that has been made.
+        """
+        self.moves_made.add(cell)
+        self.discard_unknown(cell)
+        self.pending_safes.discard(cell)
+
+    def discard_unknown(self, cell):
+        """
+        Removes a cell from self.unknown by moving the last cell into its place.
+        """
+        position = self.unknown_position.pop(cell, None)
+        if position is None:
+            return
+        last = self.unknown.pop()
+        if position < len(self.unknown):
+            self.unknown[position] = last
+            self.unknown_position[last] = position
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.discard_unknown(cell)
+        self.pending_safes.discard(cell)
+        bit = self.bit(cell)
+        for sentence in self.index.pop(bit, ()):
+            self.update_sentence(sentence, sentence.mark_mine, bit)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.pending_safes.add(cell)
+        bit = self.bit(cell)
+        for sentence in self.index.pop(bit, ()):
+            self.update_sentence(sentence, sentence.mark_safe, bit)
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence to the knowledge base and queues it for inference,
+        unless it has no cells or its cells are already known.
+        """
+        if cells and cells not in self.knowledge:
+            sentence = BitSentence(cells, count)
+            self.knowledge[cells] = sentence
+            for bit in bits_of(cells):
+                self.index.setdefault(bit, set()).add(sentence)
+            self.worklist.append(sentence)
+
+    def update_sentence(self, sentence, mark, bit):
+        """
+        Applies `mark` to a sentence and files it again under its new
+        cells, dropping it if it became empty or a duplicate.
+        The caller has already removed it from the index of `bit`.
+        """
+        del self.knowledge[sentence.cells]
+        mark(bit)
+        if sentence.cells and sentence.cells not in self.knowledge:
+            self.knowledge[sentence.cells] = sentence
+            self.worklist.append(sentence)
+        else:
+            for other in bits_of(sentence.cells):
+                self.index[other].discard(sentence)
+
+    def overlapping(self, sentence):
+        """
+        Returns the other sentences sharing at least one cell with `sentence`.
+        """
+        others = set()
+        for bit in bits_of(sentence.cells):
+            others.update(self.index[bit])
+        others.discard(sentence)
+        return others
+
+    def infer(self):
+        """
+        Draws conclusions from queued sentences until nothing new follows:
+        cells of sentences that are all safe or all mines get marked, and
+        the difference between a sentence and any subset of it is added.
+        """
+        while self.worklist:
+            sentence = self.worklist.popleft()
+
+            # Skip sentences changed or dropped since they were queued
+            if self.knowledge.get(sentence.cells) is not sentence:
+                continue
+
+            if sentence.known_safes():
+                for cell in list(self.cells_of(sentence.cells)):
+                    self.mark_safe(cell)
+                continue
+            if sentence.known_mines():
+                for cell in list(self.cells_of(sentence.cells)):
+                    self.mark_mine(cell)
+                continue
+
+            for other in self.overlapping(sentence):
+                if other.cells & ~sentence.cells == 0:
+                    self.add_sentence(sentence.cells & ~other.cells,
+                                      sentence.count - other.count)
+                elif sentence.cells & ~other.cells == 0:
+                    self.add_sentence(other.cells & ~sentence.cells,
+                                      other.count - sentence.count)
 
     def neighbors_of(self, cell):
         neighbors = []
@@ -195,28 +509,37 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        self.moves_made.add(cell)
+        self.record_move(cell)
         self.mark_safe(cell)
-        sentence = set()
+        self.add_observation(cell, count)
+        self.infer()
+
+    def add_knowledge_batch(self, observations):
+        """
+        Like add_knowledge, for a dictionary mapping many revealed cells
+        (such as a region from Minesweeper.reveal) to their counts.
+        All cells are marked before any sentence is built, and inference
+        runs once for the whole batch.
+        """
+        for cell in observations:
+            self.record_move(cell)
+            self.mark_safe(cell)
+        for cell, count in observations.items():
+            self.add_observation(cell, count)
+        self.infer()
+
+    def add_observation(self, cell, count):
+        """
+        Adds the sentence saying that `count` of the neighbors of `cell`
+        not yet known to be safe or mines are mines.
+        """
+        sentence = 0
         for c in self.neighbors_of(cell):
-            if c not in self.safes and c not in self.moves_made and c not in self.mines:
-                sentence.add(c)
-        conclusions = []
-        for s in self.knowledge:
-            if sentence.issuperset(s.cells):
-                conclusions.append(Sentence(sentence.difference(s.cells), count - s.count))
-            elif s.cells.issuperset(sentence):
-                conclusions.append(Sentence(s.cells.difference(sentence), s.count - count))
-        self.knowledge.append(Sentence(sentence, count))
-        for con in conclusions:
-            if con not in self.knowledge and len(con.cells) > 0 and con.count >= 0:
-                self.knowledge.append(con)
-        safe_cells, mines = set(), set()
-        for sent in self.knowledge:
-            safe_cells.update(sent.known_safes())
-            mines.update(sent.known_mines())
-        self.safes.update(safe_cells)
-        self.mines.update(mines)
+            if c in self.mines:
+                count -= 1
+            elif c not in self.safes:
+                sentence |= self.bit(c)
+        self.add_sentence(sentence, count)
 
     def make_safe_move(self):
         """
@@ -227,10 +550,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        for cell in self.safes:
-            if cell not in self.moves_made and cell not in self.mines:
-                return cell
-        return None
+        return next(iter(self.pending_safes), None)
 
     def make_random_move(self):
         """
@@ -239,14 +559,94 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        allowed_moves = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                allowed_moves.add((i, j))
-        not_allowed_moves = self.mines.union(self.moves_made)
-        allowed_moves = allowed_moves.difference(not_allowed_moves)
-        allowed_moves = list(allowed_moves)
-        if len(allowed_moves) == 0:
+        if len(self.unknown) == 0:
+            return None
+        else:
+            return random.choice(self.unknown)
+
+    def frontier_components(self):
+        """
+        Splits the knowledge base into groups of sentences that share
+        no cells with other groups, so each group can be solved alone.
+        """
+        seen = set()
+        for start in self.knowledge.values():
+            if start in seen:
+                continue
+            seen.add(start)
+            component = [start]
+            for sentence in component:
+                for other in self.overlapping(sentence):
+                    if other not in seen:
+                        seen.add(other)
+                        component.append(other)
+            yield component
+
+    def mine_probabilities(self, density):
+        """
+        Returns the probability of being a mine of every cell that appears
+        in the knowledge base, weighting an assignment with k mines by
+        (density / (1 - density)) ** k.
+        """
+        probabilities = dict()
+        components = dict()
+        odds = density / (1 - density)
+        for component in self.frontier_components():
+            key = frozenset((s.cells, s.count) for s in component)
+            if key in self.components:
+                result = self.components[key]
+            elif functools.reduce(operator.or_, (c for c, _ in key)
+                                  ).bit_count() <= MAX_COMPONENT_CELLS:
+                result = count_assignments(list(key))
+            else:
+                result = None
+            components[key] = result
+
+            if result is None:
+
+                # Too large to enumerate: use the worst local estimate
+                for sentence in component:
+                    p = sentence.count / sentence.size()
+                    for bit in bits_of(sentence.cells):
+                        probabilities[bit] = max(probabilities.get(bit, 0), p)
+                continue
+
+            cells, results = result
+            weights = {k: odds ** k for k in results}
+            total = sum(weights[k] * results[k][0] for k in results)
+            for i, bit in enumerate(cells):
+                probabilities[bit] = sum(
+                    weights[k] * results[k][1][i] for k in results
+                ) / total if total else density
+
+        # Keep only components still present, so the cache tracks the board
+        self.components = components
+        return probabilities
+
+    def make_probable_move(self):
+        """
+        Returns the move least likely to be a mine among cells that
+        have not already been chosen and are not known to be mines,
+        or None if there are no such cells.
+
+        Cells in the knowledge base get exact probabilities from the
+        consistent mine assignments of their component; other cells
+        are assumed to be mines at the average remaining density.
+        """
+        allowed_moves = self.unknown
+        if not allowed_moves:
             return None
+
+        if self.total_mines is None:
+            density = DEFAULT_DENSITY
         else:
-            return random.choice(allowed_moves)
\ No newline at end of file
+            density = (self.total_mines - len(self.mines)) / len(allowed_moves)
+        density = min(max(density, 1e-6), 1 - 1e-6)
+
+        probabilities = self.mine_probabilities(density)
+        lowest = min(probabilities.get(self.bit(cell), density)
+                     for cell in allowed_moves)
+        return random.choice([
+            cell for cell in allowed_moves
+            if probabilities.get(self.bit(cell), density) == lowest
+        ])
@@ -0,0 +1,106 @@
+import random
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Board configurations to benchmark, as (height, width, mines)
+CONFIGS = [
+    (8, 8, 8),
+    (9, 9, 10),
+    (16, 16, 40),
+    (16, 30, 99)
+]
+
+GAMES = 1000
+
+
+def main():
+    if len(sys.argv) > 4:
+        sys.exit("Usage: python simulate.py [games] [processes] [random|probable]")
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else GAMES
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    guess = sys.argv[3] if len(sys.argv) > 3 else "probable"
+    if guess not in ("random", "probable"):
+        sys.exit("Guess strategy must be random or probable")
+
+    for height, width, mines in CONFIGS:
+        report = benchmark(height, width, mines, games, processes, guess)
+        print(f"{height}x{width}, {mines} mines ({games} games, {guess} guesses)")
+        print(f"  Win rate: {report['win_rate']:.4f}")
+        print(f"  Moves per second: {report['moves_per_second']:.1f}")
+        print("  Knowledge update latency (ms): "
+              f"mean {report['mean_ms']:.3f}, p50 {report['p50_ms']:.3f}, "
+              f"p95 {report['p95_ms']:.3f}, max {report['max_ms']:.3f}")
+
+
+def play(game):
+    """
+    Play one seeded game headlessly.
+
+    `game` is a tuple (height, width, mines, seed, guess). Returns whether
+    the AI won, the number of moves made, the total time spent and the
+    latency of every knowledge update in seconds. Regions without
+    nearby mines are revealed at once and given to the AI as one batch.
+    """
+    height, width, mines, seed, guess = game
+    random.seed(seed)
+    board = Minesweeper(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(height=height, width=width, mines=mines)
+    latencies = []
+    start = time.perf_counter()
+    won = False
+    while True:
+        move = ai.make_safe_move()
+        if move is None:
+            if guess == "probable":
+                move = ai.make_probable_move()
+            else:
+                move = ai.make_random_move()
+        if move is None or board.is_mine(move):
+            break
+        observations = board.reveal(move)
+        before = time.perf_counter()
+        ai.add_knowledge_batch(observations)
+        latencies.append(time.perf_counter() - before)
+
+        # Won once every safe cell has been revealed
+        if len(ai.moves_made) == height * width - mines:
+            won = True
+            break
+    return won, len(latencies), time.perf_counter() - start, latencies
+
+
+def benchmark(height, width, mines, games, processes=None, guess="probable"):
+    """
+    Play `games` games seeded 0 to games - 1 in a pool of worker processes,
+    and return a dictionary summarizing win rate and speed.
+    """
+    tasks = [(height, width, mines, seed, guess) for seed in range(games)]
+    wins = moves = 0
+    seconds = 0.0
+    latencies = []
+    with Pool(processes) as pool:
+        for won, made, elapsed, times in pool.imap_unordered(play, tasks):
+            wins += won
+            moves += made
+            seconds += elapsed
+            latencies.extend(times)
+
+    latencies.sort()
+    if not latencies:
+        latencies = [0.0]
+    return {
+        "win_rate": wins / games,
+        "moves_per_second": moves / seconds if seconds else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "max_ms": latencies[-1] * 1000
+    }
+
+
+if __name__ == "__main__":
+    main()
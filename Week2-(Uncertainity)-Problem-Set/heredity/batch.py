@@ -0,0 +1,77 @@
+import csv
+import functools
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+from elimination import eliminate, make_plan
+from heredity import load_data
+
+USAGE = "Usage: python batch.py directory [json|csv] [processes]"
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit(USAGE)
+    directory = sys.argv[1]
+    output = sys.argv[2] if len(sys.argv) > 2 else "json"
+    if output not in ("json", "csv"):
+        sys.exit(USAGE)
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    filenames = sorted(
+        os.path.join(directory, filename)
+        for filename in os.listdir(directory)
+        if filename.endswith(".csv")
+    )
+    writer = csv.writer(sys.stdout) if output == "csv" else None
+    if writer:
+        writer.writerow(["file", "name", "gene_2", "gene_1", "gene_0",
+                         "trait_true", "trait_false"])
+    for filename, probabilities in infer_all(filenames, processes):
+        if writer:
+            for person, distribution in probabilities.items():
+                writer.writerow([
+                    filename, person,
+                    *(distribution["gene"][g] for g in (2, 1, 0)),
+                    distribution["trait"][True], distribution["trait"][False]
+                ])
+        else:
+            print(json.dumps({"file": filename,
+                              "probabilities": probabilities}))
+
+
+@functools.lru_cache(maxsize=None)
+def cached_plan(mothers, fathers):
+    """
+    Return the elimination plan of a pedigree shape, computing it only
+    the first time each worker sees that shape.
+    """
+    return make_plan(mothers, fathers)
+
+
+def infer(filename):
+    """
+    Load one family file and compute everyone's gene and trait
+    distributions, reusing the plan of any earlier family of the
+    same shape (same people order and parents).
+    """
+    people = load_data(filename)
+    index = {name: i for i, name in enumerate(people)}
+    mothers = tuple(index.get(people[name]["mother"]) for name in people)
+    fathers = tuple(index.get(people[name]["father"]) for name in people)
+    return filename, eliminate(people, cached_plan(mothers, fathers))
+
+
+def infer_all(filenames, processes=None, chunksize=16):
+    """
+    Compute the distributions of every family file in a pool of worker
+    processes, yielding (filename, probabilities) as each file finishes.
+    """
+    with Pool(processes) as pool:
+        yield from pool.imap_unordered(infer, filenames, chunksize=chunksize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import functools
+import heapq
+import itertools
+from collections import namedtuple
+from operator import itemgetter
+
+from heredity import compile_family, conditional_tables, empty_probabilities
+
+# Possible numbers of gene copies
+GENES = (0, 1, 2)
+
+# A function over gene variables: `scope` is a tuple of variables and
+# `table` maps each tuple of their values (in scope order) to a number
+Factor = namedtuple("Factor", ["scope", "table"])
+
+# The part of variable elimination that depends only on the shape of the
+# pedigree: the elimination `order`, the people whose factors go in each
+# clique's bucket, and each clique's `parent` in the junction tree
+Plan = namedtuple("Plan", ["order", "buckets", "parent"])
+
+
+def scope_of(mothers, fathers, i):
+    """
+    Return the variables in the factor of person i: themselves, and
+    their mother and father if known.
+    """
+    if mothers[i] is None:
+        return (i,)
+    return (i, mothers[i], fathers[i])
+
+
+@functools.lru_cache(maxsize=None)
+def person_table(has_parents, trait):
+    """
+    Return the table of a person's factor, which depends only on whether
+    their parents are known and on their trait (True, False or None).
+    """
+    prior, inherit, trait_table = conditional_tables()
+
+    def evidence(genes):
+        if trait is None:
+            return 1
+        return trait_table[genes][trait]
+
+    if not has_parents:
+        return {(g,): prior[g] * evidence(g) for g in GENES}
+    return {
+        (g, m, f): inherit[g][m][f] * evidence(g)
+        for g, m, f in itertools.product(GENES, repeat=3)
+    }
+
+
+def clique_potential(family, v, bucket):
+    """
+    Return the product of the factors of the people in `bucket`, over
+    variable v and the variables of those factors.
+    """
+    scopes = [scope_of(family.mothers, family.fathers, i) for i in bucket]
+    scope = [v]
+    for factor_scope in scopes:
+        scope.extend(u for u in factor_scope if u not in scope)
+    pattern = tuple(tuple(scope.index(u) for u in factor_scope)
+                    for factor_scope in scopes)
+    traits = tuple(family.traits[i] for i in bucket)
+    return Factor(tuple(scope), potential_table(pattern, traits))
+
+
+@functools.lru_cache(maxsize=None)
+def potential_table(pattern, traits):
+    """
+    Return the table of a clique potential, which depends only on the
+    positions in the clique of each factor's variables and on the traits
+    of the people whose factors they are, so that it is computed once per
+    worker for each such combination.
+    """
+    return multiply(
+        Factor((0,), {(g,): 1 for g in GENES}),
+        *(Factor(positions, person_table(len(positions) == 3, trait))
+          for positions, trait in zip(pattern, traits))
+    ).table
+
+
+def key_of(position):
+    """
+    Return a function picking the values at `position` out of a tuple,
+    as a tuple.
+    """
+    if len(position) == 1:
+        k = position[0]
+        return lambda values: (values[k],)
+    return itemgetter(*position)
+
+
+def multiply(*factors):
+    """
+    Return the product of factors, over the union of their scopes.
+    """
+    scope = []
+    for factor in factors:
+        scope.extend(v for v in factor.scope if v not in scope)
+    lookups = [
+        (factor.table, key_of([scope.index(v) for v in factor.scope]))
+        for factor in factors
+    ]
+    table = dict()
+    for values in itertools.product(GENES, repeat=len(scope)):
+        p = 1
+        for factor_table, key in lookups:
+            p *= factor_table[key(values)]
+        table[values] = p
+    return Factor(tuple(scope), table)
+
+
+def marginalize(factor, keep):
+    """
+    Sum a factor over every variable of its scope not in `keep`.
+    """
+    scope = tuple(v for v in factor.scope if v in keep)
+    position = [factor.scope.index(v) for v in scope]
+    table = dict.fromkeys(itertools.product(GENES, repeat=len(scope)), 0)
+    for values, p in factor.table.items():
+        table[tuple(values[k] for k in position)] += p
+    return Factor(scope, table)
+
+
+def scale(factor):
+    """
+    Scale a factor to sum to 1. Messages only matter up to a constant,
+    and scaling them keeps long pedigrees from underflowing.
+    """
+    total = sum(factor.table.values())
+    if total == 0:
+        return factor
+    return Factor(factor.scope, {
+        values: p / total for values, p in factor.table.items()
+    })
+
+
+def elimination_order(scopes, n):
+    """
+    Return an order in which to eliminate variables 0 to n - 1, greedily
+    choosing a variable with fewest neighbors in the interaction graph
+    and connecting its neighbors, as eliminating it would. On tree-shaped
+    pedigrees this removes people from the leaves inwards.
+    """
+    neighbors = [set() for _ in range(n)]
+    for scope in scopes:
+        for v in scope:
+            neighbors[v].update(u for u in scope if u != v)
+
+    # Heap of (degree, variable), with outdated entries skipped when popped
+    heap = [(len(neighbors[v]), v) for v in range(n)]
+    heapq.heapify(heap)
+    eliminated = [False] * n
+    order = []
+    while heap:
+        degree, v = heapq.heappop(heap)
+        if eliminated[v] or degree != len(neighbors[v]):
+            continue
+        eliminated[v] = True
+        order.append(v)
+        for u in neighbors[v]:
+            neighbors[u].discard(v)
+            neighbors[u].update(w for w in neighbors[v] if w != u)
+            heapq.heappush(heap, (len(neighbors[u]), u))
+    return order
+
+
+def make_plan(mothers, fathers):
+    """
+    Return the Plan for a pedigree given, for each person, the index
+    of their mother and father (or None).
+
+    Each factor goes in the bucket of its first eliminated variable.
+    Eliminating a variable forms a clique from its bucket and the messages
+    sent to it, and sends a message over the rest of the clique to the
+    clique of the first of those variables to be eliminated.
+    """
+    n = len(mothers)
+    scopes = [scope_of(mothers, fathers, i) for i in range(n)]
+    order = elimination_order(scopes, n)
+    rank = {v: k for k, v in enumerate(order)}
+
+    buckets = [[] for _ in order]
+    cliques = [{v} for v in order]
+    for i, scope in enumerate(scopes):
+        k = min(rank[v] for v in scope)
+        buckets[k].append(i)
+        cliques[k].update(scope)
+
+    parent = [None] * n
+    for k, v in enumerate(order):
+        message = cliques[k] - {v}
+        if message:
+            parent[k] = min(rank[u] for u in message)
+            cliques[parent[k]].update(message)
+    return Plan(order, buckets, parent)
+
+
+def eliminate(people, plan=None):
+    """
+    Compute everyone's gene and trait distributions exactly, treating
+    the family as a Bayesian network.
+
+    Following the junction tree of `plan` (from make_plan by default),
+    an upward pass eliminates variables in order, sending each clique's
+    summed-out belief to its parent, and a downward pass sends messages
+    back from the roots, after which each clique holds the marginal of
+    its variable. For tree-shaped pedigrees every clique has at most
+    three people, so the work is linear in the size of the family.
+    """
+    family = compile_family(people)
+    if plan is None:
+        plan = make_plan(family.mothers, family.fathers)
+    order, parent = plan.order, plan.parent
+
+    # Multiply each bucket's factors into its clique's potential
+    potentials = [
+        clique_potential(family, v, bucket)
+        for v, bucket in zip(order, plan.buckets)
+    ]
+
+    # Upward pass: eliminate variables in order
+    incoming = [dict() for _ in order]
+    upward = [None] * len(order)
+    for k, v in enumerate(order):
+        belief = multiply(potentials[k], *incoming[k].values())
+        upward[k] = scale(marginalize(belief, set(belief.scope) - {v}))
+        if parent[k] is not None:
+            incoming[parent[k]][k] = upward[k]
+
+    # Downward pass: send each clique what the rest of the tree says about
+    # the variables it shares with its parent, from the roots outwards
+    downward = [None] * len(order)
+    for k in reversed(range(len(order))):
+        if parent[k] is None:
+            continue
+        p = parent[k]
+        messages = [m for child, m in incoming[p].items() if child != k]
+        if downward[p] is not None:
+            messages.append(downward[p])
+        downward[k] = scale(marginalize(multiply(potentials[p], *messages),
+                                        set(upward[k].scope)))
+
+    # Each clique's belief, summed to its own variable, is its marginal
+    probabilities = empty_probabilities(people)
+    for k, v in enumerate(order):
+        messages = list(incoming[k].values())
+        if downward[k] is not None:
+            messages.append(downward[k])
+        marginal = marginalize(multiply(potentials[k], *messages), {v})
+        total = sum(marginal.table.values())
+
+        trait = family.traits[v]
+        distribution = probabilities[family.names[v]]
+        for g in GENES:
+            distribution["gene"][g] = marginal.table[(g,)] / total
+        if trait is None:
+            p = sum(distribution["gene"][g] * family.trait[g][True]
+                    for g in GENES)
+        else:
+            p = 1 if trait else 0
+        distribution["trait"][True] = p
+        distribution["trait"][False] = 1 - p
+    return probabilities
@@ -1,7 +1,8 @@
 import csv
+import functools
 import itertools
 import sys
-from copy import deepcopy
+from collections import namedtuple
 
 PROBS = {
 
@@ -37,16 +38,54 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Integer-indexed family, as built by compile_family
+Family = namedtuple("Family", [
+    "names", "mothers", "fathers", "traits", "prior", "inherit", "trait"
+])
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python heredity.py data.csv "
+                 "[enumerate|eliminate|vectorized|likelihood|gibbs]")
     people = load_data(sys.argv[1])
+    method = sys.argv[2] if len(sys.argv) == 3 else "enumerate"
+
+    if method == "enumerate":
+        probabilities = enumerate_probabilities(people)
+    elif method == "eliminate":
+        from elimination import eliminate
+        probabilities = eliminate(people)
+    elif method == "vectorized":
+        from vectorized import vectorized_probabilities
+        probabilities = vectorized_probabilities(people)
+    elif method in ("likelihood", "gibbs"):
+        from sampling import sample_probabilities
+        probabilities, diagnostics = sample_probabilities(people, method)
+    else:
+        sys.exit(f"Unknown method: {method}")
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+    if method in ("likelihood", "gibbs"):
+        ess = ", ".join(f"{e:.0f}" for e in diagnostics["ess"])
+        print(f"Effective sample sizes: {ess}")
+        print(f"R-hat: {diagnostics['r_hat']:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Return gene and trait distributions of all zeros for each person.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -61,38 +100,37 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+def enumerate_probabilities(people):
+    """
+    Compute everyone's gene and trait distributions by summing the
+    joint probability of every assignment consistent with the evidence.
+    """
 
-        # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+    family = compile_family(people)
+    n = len(family.names)
+    genes_total = [[0.0] * 3 for _ in range(n)]
+    traits_total = [[0.0] * 2 for _ in range(n)]
 
-                # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
-                update(probabilities, one_gene, two_genes, have_trait, p)
+    # Loop over every assignment consistent with known information
+    for one_gene, two_genes, have_trait, p in assignments(family):
+        for i in range(n):
+            bit = 1 << i
+            genes_total[i][2 if two_genes & bit else
+                           1 if one_gene & bit else 0] += p
+            traits_total[i][1 if have_trait & bit else 0] += p
+
+    # Keep track of gene and trait probabilities for each person
+    probabilities = empty_probabilities(people)
+    for i, person in enumerate(family.names):
+        for g in range(3):
+            probabilities[person]["gene"][g] = genes_total[i][g]
+        probabilities[person]["trait"][True] = traits_total[i][True]
+        probabilities[person]["trait"][False] = traits_total[i][False]
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -128,47 +166,141 @@ def powerset(s):
         )
     ]
 
-def set_vals(people, people_to_set, key, value):
-    for person in people_to_set:
-        people[person][key] = value
-def setup(ps, one_gene, two_genes, have_trait):
-    copy_ps = deepcopy(ps)
-    names = set(copy_ps.keys())
-
-    set_vals(copy_ps, two_genes, 'gene', 2)
-    set_vals(copy_ps, one_gene, 'gene', 1)
-    set_vals(copy_ps, names.difference(one_gene.union(two_genes)), 'gene', 0)
-
-    set_vals(copy_ps, have_trait, 'trait', True)
-    set_vals(copy_ps, names.difference(have_trait), 'trait', False)
-    return copy_ps
-
-def parent_prob(parent):
-    if parent['gene'] == 2:
+def parents_first(family):
+    """
+    Return the indices of `family` ordered so that parents come before
+    their children.
+    """
+    order, seen = [], set()
+    def visit(i):
+        if i is None or i in seen:
+            return
+        seen.add(i)
+        visit(family.mothers[i])
+        visit(family.fathers[i])
+        order.append(i)
+    for i in range(len(family.names)):
+        visit(i)
+    return order
+
+def assignments(family):
+    """
+    Lazily yield every assignment of genes and traits consistent with the
+    known traits, with its joint probability, as tuples
+    (one_gene, two_genes, have_trait, p) where the first three are
+    bitmasks with bit i set for person i of `family`.
+
+    People are assigned in parents_first order, so each one's factor of
+    the joint probability is known as soon as they are assigned. Known
+    traits are fixed rather than enumerated, and branches whose partial
+    probability is already zero are skipped.
+    """
+    n = len(family.names)
+    order = parents_first(family)
+    genes = [0] * n
+    mothers, fathers = family.mothers, family.fathers
+    prior, inherit, trait = family.prior, family.inherit, family.trait
+    choices = [(False, True) if t is None else (t,) for t in family.traits]
+
+    def extend(k, one_gene, two_genes, have_trait, p):
+        if k == n:
+            yield one_gene, two_genes, have_trait, p
+            return
+        i = order[k]
+        bit = 1 << i
+        for g in range(3):
+            if mothers[i] is None:
+                q = p * prior[g]
+            else:
+                q = p * inherit[g][genes[mothers[i]]][genes[fathers[i]]]
+            if q == 0:
+                continue
+            genes[i] = g
+            one = one_gene | bit if g == 1 else one_gene
+            two = two_genes | bit if g == 2 else two_genes
+            for t in choices[i]:
+                r = q * trait[g][t]
+                if r != 0:
+                    yield from extend(k + 1, one, two,
+                                      have_trait | bit if t else have_trait, r)
+
+    yield from extend(0, 0, 0, 0, 1.0)
+
+def parent_prob(genes):
+    """
+    Return the probability that a parent with `genes` copies
+    of the gene passes one on to their child.
+    """
+    if genes == 2:
         return 1 - PROBS['mutation']
-    elif parent['gene'] == 0:
+    elif genes == 0:
         return PROBS['mutation']
     else:
         return 0.5
 
-def probability(all_people, people_to_calc, gene_copies):
-    prob = 1.0
-    for person in people_to_calc:
-        father, mother = all_people[person]['father'], all_people[person]['mother']
-        if father is not None:
-            father = parent_prob(all_people[father])
-            mother = parent_prob(all_people[mother])
-            if gene_copies == 0:
-                prob *= (1 - father) * (1 - mother)
-            elif gene_copies == 1:
-                prob *= father * (1 - mother) + (1 - father) * mother
-            else:
-                prob *= father *mother          
+def child_prob(genes, mother, father):
+    """
+    Return the probability that a child has `genes` copies of the gene
+    given how many copies their mother and father have.
+    """
+    mother, father = parent_prob(mother), parent_prob(father)
+    if genes == 0:
+        return (1 - father) * (1 - mother)
+    elif genes == 1:
+        return father * (1 - mother) + (1 - father) * mother
+    else:
+        return father * mother
+
+@functools.lru_cache(maxsize=None)
+def conditional_tables():
+    """
+    Return the `prior`, `inherit` and `trait` tables of compile_family,
+    computed from PROBS once per process and shared by every family.
+    """
+    prior = [PROBS['gene'][g] for g in range(3)]
+    inherit = [[[child_prob(g, m, f) for f in range(3)]
+                for m in range(3)] for g in range(3)]
+    trait = [[PROBS['trait'][g][False], PROBS['trait'][g][True]]
+             for g in range(3)]
+    return prior, inherit, trait
+
+
+def compile_family(people):
+    """
+    Return an integer-indexed form of `people` for computing joint
+    probabilities without dictionaries: parents become indices into
+    `names` (None if unknown), and `inherit[g][m][f]` and `trait[g][t]`
+    hold the conditional probabilities from PROBS.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    prior, inherit, trait = conditional_tables()
+    return Family(
+        names=names,
+        mothers=[index.get(people[name]['mother']) for name in names],
+        fathers=[index.get(people[name]['father']) for name in names],
+        traits=[people[name]['trait'] for name in names],
+        prior=prior,
+        inherit=inherit,
+        trait=trait
+    )
+
+def family_probability(family, genes, traits):
+    """
+    Return the joint probability that person i has genes[i] copies of the
+    gene and has the trait exactly when traits[i] is true.
+    """
+    mothers, fathers = family.mothers, family.fathers
+    prior, inherit, trait = family.prior, family.inherit, family.trait
+    P = 1.0
+    for i, g in enumerate(genes):
+        mother = mothers[i]
+        if mother is None:
+            P *= prior[g]
         else:
-            prob *= PROBS["gene"][gene_copies]
-        have_trait = all_people[person]['trait']
-        prob *= PROBS["trait"][gene_copies][have_trait]
-    return prob
+            P *= inherit[g][genes[mother]][genes[fathers[i]]]
+        P *= trait[g][traits[i]]
+    return P
 
 
 def joint_probability(people, one_gene, two_genes, have_trait):
@@ -182,10 +314,11 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
     """
-    ppl = setup(people, one_gene, two_genes, have_trait)
-    P = probability(ppl, two_genes, 2) * probability(ppl, one_gene, 1)
-    P *= probability(ppl, set(people.keys()).difference(one_gene.union(two_genes)), 0)
-    return P
+    family = compile_family(people)
+    genes = [2 if name in two_genes else 1 if name in one_gene else 0
+             for name in family.names]
+    traits = [name in have_trait for name in family.names]
+    return family_probability(family, genes, traits)
 
 def increment(probs, people, key, idx, val):
     for i in people:
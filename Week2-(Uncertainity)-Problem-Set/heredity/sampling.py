@@ -0,0 +1,240 @@
+import math
+import random
+from multiprocessing import Pool
+
+from heredity import compile_family, empty_probabilities, parents_first
+
+# Default number of samples drawn by each chain
+SAMPLES = 10000
+
+# Default number of chains, each run in its own process
+CHAINS = 4
+
+
+def sample_probabilities(people, method="gibbs", samples=SAMPLES,
+                         chains=CHAINS, burn_in=None, processes=None,
+                         seed=None):
+    """
+    Estimate everyone's gene and trait distributions by sampling, for
+    pedigrees too large or too loopy for exact inference.
+
+    `method` is "likelihood" for likelihood weighting or "gibbs" for
+    Gibbs sampling. Each of `chains` independent chains draws `samples`
+    samples (Gibbs chains first discard `burn_in` sweeps, a tenth of
+    `samples` by default), seeded from `seed`, in a pool of processes.
+
+    Return the estimated probabilities, in the same form as
+    enumerate_probabilities, and a dictionary of convergence diagnostics:
+    "ess" is the effective sample size of each chain (for Gibbs chains, the
+    smallest over everyone's gene counts, estimated by batch means), and
+    "r_hat" the
+    largest potential scale reduction of any gene or trait probability
+    across chains, which approaches 1 as chains agree.
+    """
+    if method not in ("likelihood", "gibbs"):
+        raise ValueError(f"unknown sampling method: {method}")
+    if burn_in is None:
+        burn_in = samples // 10
+    family = compile_family(people)
+    base = random.randrange(1 << 32) if seed is None else seed
+    tasks = [(family, method, samples, burn_in, base + c) for c in range(chains)]
+    if chains == 1:
+        results = [run_chain(tasks[0])]
+    else:
+        with Pool(processes) as pool:
+            results = pool.map(run_chain, tasks)
+
+    # Pool chains, weighting each by its total weight
+    n = len(family.names)
+    genes_total = [[0.0] * 3 for _ in range(n)]
+    traits_total = [[0.0] * 2 for _ in range(n)]
+    for genes, traits, _ in results:
+        for i in range(n):
+            for g in range(3):
+                genes_total[i][g] += genes[i][g]
+            for t in range(2):
+                traits_total[i][t] += traits[i][t]
+
+    probabilities = empty_probabilities(people)
+    for i, person in enumerate(family.names):
+        genes, traits = sum(genes_total[i]), sum(traits_total[i])
+        for g in range(3):
+            probabilities[person]["gene"][g] = (
+                genes_total[i][g] / genes if genes else 0)
+        probabilities[person]["trait"][True] = (
+            traits_total[i][1] / traits if traits else 0)
+        probabilities[person]["trait"][False] = (
+            traits_total[i][0] / traits if traits else 0)
+
+    diagnostics = {
+        "ess": [ess for _, _, ess in results],
+        "r_hat": r_hat(results, samples)
+    }
+    return probabilities, diagnostics
+
+
+def r_hat(results, samples):
+    """
+    Return the largest Gelman-Rubin statistic over every gene and trait
+    probability, treating each estimate as the mean of an indicator so
+    that its within-chain variance is p * (1 - p).
+    """
+    if len(results) < 2:
+        return float("nan")
+    worst = 1.0
+    n = len(results[0][0])
+    for i in range(n):
+        for field, values in ((0, range(3)), (1, range(2))):
+            for v in values:
+                means = []
+                for chain in results:
+                    total = sum(chain[field][i])
+                    means.append(chain[field][i][v] / total if total else 0)
+                mean = sum(means) / len(means)
+                within = sum(p * (1 - p) for p in means) / len(means)
+                between = samples * sum(
+                    (p - mean) ** 2 for p in means) / (len(means) - 1)
+                if within > 0:
+                    pooled = (samples - 1) / samples * within + between / samples
+                    worst = max(worst, math.sqrt(pooled / within))
+    return worst
+
+
+def run_chain(task):
+    """
+    Run one chain, given a tuple (family, method, samples, burn_in, seed).
+
+    Return weighted counts of each person's gene counts and traits, and
+    the effective sample size of the chain.
+    """
+    family, method, samples, burn_in, seed = task
+    rng = random.Random(seed)
+    if method == "likelihood":
+        return likelihood_weighting(family, samples, rng)
+    return gibbs(family, samples, burn_in, rng)
+
+
+def likelihood_weighting(family, samples, rng):
+    """
+    Sample everyone's genes parents first, and unknown traits given genes,
+    weighting each sample by the probability of the known traits.
+    """
+    n = len(family.names)
+    order = parents_first(family)
+    genes = [0] * n
+    traits = [False] * n
+    genes_total = [[0.0] * 3 for _ in range(n)]
+    traits_total = [[0.0] * 2 for _ in range(n)]
+    weights = squares = 0.0
+    for _ in range(samples):
+        weight = 1.0
+        for i in order:
+            mother = family.mothers[i]
+            if mother is None:
+                distribution = family.prior
+            else:
+                father = family.fathers[i]
+                distribution = [family.inherit[g][genes[mother]][genes[father]]
+                                for g in range(3)]
+            genes[i] = rng.choices(range(3), weights=distribution)[0]
+            if family.traits[i] is None:
+                traits[i] = rng.random() < family.trait[genes[i]][True]
+            else:
+                traits[i] = family.traits[i]
+                weight *= family.trait[genes[i]][traits[i]]
+        for i in range(n):
+            genes_total[i][genes[i]] += weight
+            traits_total[i][traits[i]] += weight
+        weights += weight
+        squares += weight * weight
+    ess = weights ** 2 / squares if squares else 0
+    return genes_total, traits_total, ess
+
+
+def gibbs(family, samples, burn_in, rng):
+    """
+    Resample each person's genes in turn from their distribution given
+    everyone else's genes and the known traits. Unknown traits are not
+    sampled: each sweep adds their probability given the current genes.
+    """
+    n = len(family.names)
+    children = [[] for _ in range(n)]
+    for i in range(n):
+        if family.mothers[i] is not None:
+            children[family.mothers[i]].append(i)
+            children[family.fathers[i]].append(i)
+
+    # Start from a sample of the genes alone
+    genes = [0] * n
+    for i in parents_first(family):
+        mother = family.mothers[i]
+        if mother is None:
+            distribution = family.prior
+        else:
+            father = family.fathers[i]
+            distribution = [family.inherit[g][genes[mother]][genes[father]]
+                            for g in range(3)]
+        genes[i] = rng.choices(range(3), weights=distribution)[0]
+
+    def local(i, g):
+        """Probability of everything that mentions person i's genes."""
+        genes[i] = g
+        mother = family.mothers[i]
+        if mother is None:
+            p = family.prior[g]
+        else:
+            p = family.inherit[g][genes[mother]][genes[family.fathers[i]]]
+        if family.traits[i] is not None:
+            p *= family.trait[g][family.traits[i]]
+        for c in children[i]:
+            p *= family.inherit[genes[c]][genes[family.mothers[c]]][
+                genes[family.fathers[c]]]
+        return p
+
+    genes_total = [[0.0] * 3 for _ in range(n)]
+    traits_total = [[0.0] * 2 for _ in range(n)]
+
+    # Gene counts of consecutive batches of kept sweeps
+    batch_size = max(1, math.isqrt(samples))
+    batches = []
+    batch = [[0] * 3 for _ in range(n)]
+    for sweep in range(burn_in + samples):
+        for i in range(n):
+            distribution = [local(i, g) for g in range(3)]
+            genes[i] = rng.choices(range(3), weights=distribution)[0]
+        if sweep < burn_in:
+            continue
+        for i in range(n):
+            genes_total[i][genes[i]] += 1
+            if family.traits[i] is None:
+                p = family.trait[genes[i]][True]
+            else:
+                p = 1.0 if family.traits[i] else 0.0
+            traits_total[i][1] += p
+            traits_total[i][0] += 1 - p
+            batch[i][genes[i]] += 1
+        if (sweep - burn_in + 1) % batch_size == 0:
+            batches.append(batch)
+            batch = [[0] * 3 for _ in range(n)]
+    return genes_total, traits_total, batch_means_ess(batches, batch_size)
+
+
+def batch_means_ess(batches, batch_size):
+    """
+    Return the smallest effective sample size of any person's gene count
+    indicators, given their counts in consecutive batches of sweeps.
+    Correlated sweeps make batch means vary more than independent samples
+    would, by a factor of the batch size over its effective sample size.
+    """
+    count = len(batches)
+    if count < 2:
+        return float("nan")
+    smallest = float(count * batch_size)
+    for i in range(len(batches[0])):
+        for g in range(3):
+            means = [batch[i][g] / batch_size for batch in batches]
+            p = sum(means) / count
+            spread = sum((m - p) ** 2 for m in means) / (count - 1)
+            if spread > 0:
+                smallest = min(smallest, p * (1 - p) * count / spread)
+    return smallest
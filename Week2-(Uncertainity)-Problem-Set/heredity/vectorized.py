@@ -0,0 +1,76 @@
+import numpy as np
+
+from heredity import compile_family, empty_probabilities, normalize
+
+# Largest number of joint probabilities held in memory at once
+CHUNK_SIZE = 1 << 20
+
+
+def vectorized_probabilities(people, chunk_size=CHUNK_SIZE):
+    """
+    Compute everyone's gene and trait distributions by brute force,
+    like enumerate_probabilities, but many assignments at a time.
+
+    Each assignment of gene counts to all n people is an integer below
+    3 ** n whose base-3 digits are the counts, and each assignment of
+    traits to the k people with unknown traits is a k-bit mask. Chunks
+    of gene codes are expanded into digits and their joint probabilities
+    with every trait mask computed at once with broadcasted NumPy
+    operations, then reduced to marginals with weighted sums.
+    """
+    family = compile_family(people)
+    n = len(family.names)
+    prior = np.array(family.prior)
+    inherit = np.array(family.inherit)
+    trait = np.array(family.trait)
+
+    parents = [i for i in range(n) if family.mothers[i] is not None]
+    mothers = np.array([family.mothers[i] for i in parents], dtype=np.int64)
+    fathers = np.array([family.fathers[i] for i in parents], dtype=np.int64)
+    founders = [i for i in range(n) if family.mothers[i] is None]
+
+    # Bit j of a trait mask says whether the j-th unknown person has the trait
+    unknown = [i for i in range(n) if family.traits[i] is None]
+    known = [i for i in range(n) if family.traits[i] is not None]
+    masks = np.arange(1 << len(unknown), dtype=np.int64)
+    has_trait = (masks[:, None] >> np.arange(len(unknown))) & 1
+
+    genes_total = np.zeros((n, 3))
+    traits_total = np.zeros((n, 2))
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    step = max(1, chunk_size // len(masks))
+    for start in range(0, 3 ** n, step):
+        codes = np.arange(start, min(start + step, 3 ** n), dtype=np.int64)
+        genes = (codes[:, None] // powers) % 3
+
+        # Probability of the gene counts, one row per assignment
+        p = prior[genes[:, founders]].prod(axis=1)
+        p *= inherit[genes[:, parents], genes[:, mothers],
+                     genes[:, fathers]].prod(axis=1)
+        for i in known:
+            p *= trait[genes[:, i], int(family.traits[i])]
+
+        # Times the probability of each trait mask, one column per mask
+        joint = np.broadcast_to(p[:, None], (len(codes), len(masks))).copy()
+        for j, i in enumerate(unknown):
+            joint *= trait[genes[:, i][:, None], has_trait[:, j][None, :]]
+
+        by_genes = joint.sum(axis=1)
+        by_traits = joint.sum(axis=0)
+        for i in range(n):
+            genes_total[i] += np.bincount(genes[:, i], weights=by_genes,
+                                          minlength=3)
+        for j, i in enumerate(unknown):
+            traits_total[i] += np.bincount(has_trait[:, j], weights=by_traits,
+                                           minlength=2)
+        for i in known:
+            traits_total[i][int(family.traits[i])] += by_traits.sum()
+
+    probabilities = empty_probabilities(people)
+    for i, person in enumerate(family.names):
+        for g in range(3):
+            probabilities[person]["gene"][g] = float(genes_total[i][g])
+        probabilities[person]["trait"][True] = float(traits_total[i][1])
+        probabilities[person]["trait"][False] = float(traits_total[i][0])
+    normalize(probabilities)
+    return probabilities
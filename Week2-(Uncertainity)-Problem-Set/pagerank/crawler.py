@@ -0,0 +1,132 @@
+import os
+import re
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# Same pattern as `crawl`
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes of a page read at a time
+CHUNK_SIZE = 1 << 16
+
+# Names of the files written by `crawl_to_disk` in its output directory
+PAGES_FILE = "pages.txt"
+EDGES_FILE = "edges.bin"
+
+# Page index shared with worker processes by `start_worker`
+corpus_index = dict()
+
+
+def main():
+    if len(sys.argv) not in (3, 4, 5):
+        sys.exit("Usage: python crawler.py corpus output [workers] "
+                 "[threads|processes]")
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    kind = sys.argv[4] if len(sys.argv) > 4 else "processes"
+    if kind not in ("threads", "processes"):
+        sys.exit(f"Unknown worker kind: {kind}")
+    pages, edges = crawl_to_disk(sys.argv[1], sys.argv[2], workers, kind)
+    print(f"Crawled {pages} pages with {edges} links into {sys.argv[2]}")
+
+
+def start_worker(pages):
+    """
+    Give a worker the index of every page in the corpus.
+    """
+    global corpus_index
+    corpus_index = pages
+
+
+def page_links(path):
+    """
+    Return the set of links on the page at `path`. The file is read in
+    chunks and only its links are kept; a tag cut off at the end of a
+    chunk is carried over to the next one.
+    """
+    links = set()
+    leftover = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            text = leftover + chunk
+            end = 0
+            for match in LINK.finditer(text):
+                links.add(match.group(1))
+                end = match.end()
+            start = text.rfind("<", end)
+            leftover = text[start:] if start != -1 else ""
+    return links
+
+
+def extract_links(path):
+    """
+    Return the sorted indices of the corpus pages linked to by the page
+    at `path`, other than itself.
+    """
+    own = corpus_index[os.path.basename(path)]
+    targets = {
+        corpus_index[link] for link in page_links(path)
+        if link in corpus_index
+    }
+    return sorted(targets - {own})
+
+
+def crawl_to_disk(directory, output, workers=None, kind="processes"):
+    """
+    Parse a directory of HTML pages in a pool of worker threads or
+    processes, and write the link graph into the directory `output`:
+    PAGES_FILE lists page names one per line, so that page i is on line i,
+    and EDGES_FILE holds each link as a pair of 32-bit page indices
+    (source, target), written as each page is parsed.
+
+    Return the number of pages and of links.
+    """
+    pages = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html")
+    )
+    pages_index = {page: i for i, page in enumerate(pages)}
+    paths = [os.path.join(directory, page) for page in pages]
+
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, PAGES_FILE), "w") as f:
+        for page in pages:
+            f.write(page + "\n")
+
+    if kind == "threads":
+        start_worker(pages_index)
+        executor = ThreadPoolExecutor(workers)
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=start_worker,
+                                       initargs=(pages_index,))
+    edges = 0
+    with executor, open(os.path.join(output, EDGES_FILE), "wb") as f:
+        results = executor.map(extract_links, paths, chunksize=64)
+        for source, targets in enumerate(results):
+            pairs = array("i")
+            for target in targets:
+                pairs.extend((source, target))
+            pairs.tofile(f)
+            edges += len(targets)
+    return len(pages), edges
+
+
+def load_graph(output):
+    """
+    Return the sparse.Graph of a link graph written by `crawl_to_disk`.
+    """
+    import numpy as np
+    from sparse import graph_from_edges
+
+    with open(os.path.join(output, PAGES_FILE)) as f:
+        pages = [line.rstrip("\n") for line in f]
+    edges = np.fromfile(os.path.join(output, EDGES_FILE), dtype=np.int32)
+    edges = edges.reshape(-1, 2).astype(np.int64)
+    return graph_from_edges(pages, edges[:, 0], edges[:, 1])
+
+
+if __name__ == "__main__":
+    main()
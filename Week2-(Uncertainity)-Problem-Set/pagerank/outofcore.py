@@ -0,0 +1,173 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from crawler import EDGES_FILE, PAGES_FILE
+from sparse import MAX_ITERATIONS, TOLERANCE
+from store import RANKS_FILE
+
+DAMPING = 0.85
+
+# Names of the files written by `sort_edges` next to EDGES_FILE
+SORTED_FILE = "sorted.bin"
+DEGREES_FILE = "degrees.bin"
+
+# Links read from disk at a time
+BLOCK_EDGES = 1 << 20
+
+# Most links sorted in memory at once by `sort_edges`
+BUCKET_EDGES = 1 << 24
+
+# Number of pages printed by main
+TOP = 10
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python outofcore.py output")
+    output = sys.argv[1]
+    if not is_sorted(output):
+        sort_edges(output)
+    ranks = outofcore_pagerank(output, DAMPING)
+    ranks.tofile(os.path.join(output, RANKS_FILE))
+
+    # Look up names of only the top pages
+    top = np.argsort(-ranks)[:TOP]
+    names = dict()
+    with open(os.path.join(output, PAGES_FILE)) as f:
+        wanted = set(top.tolist())
+        for i, line in enumerate(f):
+            if i in wanted:
+                names[i] = line.rstrip("\n")
+    print(f"PageRank Results for {len(ranks)} pages")
+    for i in top.tolist():
+        print(f"  {names[i]}: {ranks[i]:.4f}")
+
+
+def page_count(output):
+    """
+    Return the number of pages listed in PAGES_FILE, without keeping them.
+    """
+    with open(os.path.join(output, PAGES_FILE)) as f:
+        return sum(1 for _ in f)
+
+
+def is_sorted(output):
+    """
+    Return True if SORTED_FILE and DEGREES_FILE in `output` exist and were
+    written after the last change to PAGES_FILE or EDGES_FILE, such as by
+    `store.LinkStore.save`.
+    """
+    try:
+        written = min(
+            os.stat(os.path.join(output, name)).st_mtime_ns
+            for name in (SORTED_FILE, DEGREES_FILE)
+        )
+    except FileNotFoundError:
+        return False
+    changed = max(
+        os.stat(os.path.join(output, name)).st_mtime_ns
+        for name in (PAGES_FILE, EDGES_FILE)
+    )
+    return written >= changed
+
+
+def edge_blocks(path, block_edges=BLOCK_EDGES):
+    """
+    Yield the (source, target) pairs of a binary edge file as arrays of
+    at most `block_edges` rows, read through a memory map.
+    """
+    if os.path.getsize(path) == 0:
+        return
+    edges = np.memmap(path, dtype=np.int32, mode="r").reshape(-1, 2)
+    for start in range(0, len(edges), block_edges):
+        yield np.asarray(edges[start:start + block_edges])
+
+
+def sort_edges(output, block_edges=BLOCK_EDGES, bucket_edges=BUCKET_EDGES):
+    """
+    Write the links in EDGES_FILE of a directory written by
+    `crawler.crawl_to_disk` to SORTED_FILE, in the same format but sorted
+    by target, and the number of links on each page to DEGREES_FILE.
+
+    Pages are split into consecutive ranges with about `bucket_edges`
+    incoming links each. One pass copies every link into a temporary file
+    for its target's range, then each range is sorted in memory in turn.
+    """
+    n = page_count(output)
+    edges_path = os.path.join(output, EDGES_FILE)
+
+    # Count links into and out of each page
+    in_degree = np.zeros(n, dtype=np.int64)
+    out_degree = np.zeros(n, dtype=np.int64)
+    for block in edge_blocks(edges_path, block_edges):
+        in_degree += np.bincount(block[:, 1], minlength=n)
+        out_degree += np.bincount(block[:, 0], minlength=n)
+    out_degree.astype(np.int32).tofile(os.path.join(output, DEGREES_FILE))
+    buckets = (np.cumsum(in_degree) - in_degree) // bucket_edges
+    count = int(buckets[-1]) + 1 if n else 0
+
+    with tempfile.TemporaryDirectory(dir=output) as temporary:
+        paths = [os.path.join(temporary, f"{b}.bin") for b in range(count)]
+        files = [open(path, "wb") for path in paths]
+        try:
+            for block in edge_blocks(edges_path, block_edges):
+                bucket = buckets[block[:, 1]]
+                order = np.argsort(bucket, kind="stable")
+                bounds = np.searchsorted(bucket[order], np.arange(count + 1))
+                for b in np.flatnonzero(np.diff(bounds)).tolist():
+                    block[order[bounds[b]:bounds[b + 1]]].tofile(files[b])
+        finally:
+            for f in files:
+                f.close()
+
+        with open(os.path.join(output, SORTED_FILE), "wb") as f:
+            for path in paths:
+                edges = np.fromfile(path, dtype=np.int32).reshape(-1, 2)
+                edges[np.argsort(edges[:, 1], kind="stable")].tofile(f)
+
+
+def outofcore_pagerank(output, damping_factor, tolerance=TOLERANCE,
+                       max_iterations=MAX_ITERATIONS,
+                       block_edges=BLOCK_EDGES):
+    """
+    Return the PageRank vector of the link graph in `output`, like
+    `sparse.power_iteration`, after `sort_edges` has been run on it.
+
+    Links and link counts stay on disk and are streamed through memory
+    maps, `block_edges` links at a time, so only the current and next
+    rank vectors are held in memory. Because links are sorted by target,
+    each block adds into one contiguous range of the next rank vector.
+    """
+    out_degree = np.memmap(os.path.join(output, DEGREES_FILE),
+                           dtype=np.int32, mode="r")
+    n = len(out_degree)
+    sorted_path = os.path.join(output, SORTED_FILE)
+    ranks = np.full(n, 1 / n)
+    for _ in range(max_iterations):
+        dangling = 0.0
+        for start in range(0, n, block_edges):
+            degree = out_degree[start:start + block_edges]
+            dangling += ranks[start:start + block_edges][degree == 0].sum()
+
+        updated = np.full(n, (1 - damping_factor) / n
+                          + damping_factor * dangling / n)
+        for block in edge_blocks(sorted_path, block_edges):
+            sources, targets = block[:, 0], block[:, 1]
+            first, last = int(targets[0]), int(targets[-1])
+            updated[first:last + 1] += damping_factor * np.bincount(
+                targets - first,
+                weights=ranks[sources] / out_degree[sources],
+                minlength=last - first + 1)
+
+        residual = np.abs(updated - ranks).sum()
+        ranks = updated
+        if residual < tolerance:
+            break
+    return ranks
+
+
+if __name__ == "__main__":
+    main()
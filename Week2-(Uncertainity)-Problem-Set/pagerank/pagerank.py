@@ -10,17 +10,39 @@ SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
+    usage = ("Usage: python pagerank.py corpus "
+             "[python|sparse [jacobi|gauss-seidel|quadratic|adaptive]]")
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit(usage)
+    backend = sys.argv[2] if len(sys.argv) > 2 else "python"
+    if backend not in ("python", "sparse"):
+        sys.exit(f"Unknown backend: {backend}")
+    solver = sys.argv[3] if len(sys.argv) > 3 else "jacobi"
+    if len(sys.argv) > 3:
+        if backend != "sparse":
+            sys.exit(usage)
+        from sparse import SOLVERS
+        if solver not in SOLVERS:
+            sys.exit(f"Unknown solver: {solver}")
     corpus = crawl(sys.argv[1])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    if backend == "sparse":
+        from sparse import sparse_pagerank
+        telemetry = []
+        ranks = sparse_pagerank(corpus, DAMPING, solver=solver,
+                                telemetry=telemetry)
+    else:
+        ranks = iterate_pagerank(corpus, DAMPING)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    if backend == "sparse":
+        last = telemetry[-1]
+        print(f"Solver {solver} took {last['iteration']} iterations "
+              f"({last['seconds']:.4f}s, residual {last['residual']:.2e})")
 
 
 def crawl(directory):
@@ -83,18 +105,36 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    PR = dict().fromkeys(corpus.keys(), 0)
-    next_page = random.choice(list(corpus.keys()))
-    next_sample = transition_model(corpus, next_page, damping_factor)
-    PR[next_page] = 1
+    pages, links = outlink_table(corpus)
+    N = len(pages)
+    visits = [0] * N
+
+    # Each step follows transition_model in constant time: with probability
+    # `damping_factor` follow a random link (if there are any), otherwise
+    # jump to a random page
+    page = random.randrange(N)
     for _ in range(n):
-        next_page = random.choices(list(next_sample.keys()), 
-            weights = list(next_sample.values()))[0]
-        next_sample = transition_model(corpus, next_page, damping_factor)
-        PR[next_page] += 1
-    for page in corpus.keys():
-        PR[page] /= n
-    return PR
+        visits[page] += 1
+        outlinks = links[page]
+        if outlinks and random.random() < damping_factor:
+            page = outlinks[random.randrange(len(outlinks))]
+        else:
+            page = random.randrange(N)
+    return {pages[i]: visits[i] / n for i in range(N)}
+
+
+def outlink_table(corpus):
+    """
+    Return the pages of `corpus` as a list, and for each page the list
+    of indices of the pages it links to within the corpus.
+    """
+    pages = list(corpus.keys())
+    index = {page: i for i, page in enumerate(pages)}
+    links = [
+        [index[link] for link in corpus[page] if link in index]
+        for page in pages
+    ]
+    return pages, links
 
 
 
@@ -0,0 +1,151 @@
+import sys
+from collections import deque
+
+import numpy as np
+
+from pagerank import DAMPING, crawl
+from sparse import MAX_ITERATIONS, TOLERANCE, build_graph
+
+# Residual per link below which push_pagerank stops pushing a page
+EPSILON = 1e-6
+
+# Number of pages printed for each seed by main
+TOP = 5
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python personalized.py corpus page [page ...]")
+    corpus = crawl(sys.argv[1])
+    graph = build_graph(corpus)
+    seeds = sys.argv[2:]
+    for seed in seeds:
+        if seed not in corpus:
+            sys.exit(f"Unknown page: {seed}")
+
+    # All seeds together by block iteration, each alone by pushing
+    ranks = personalized_pagerank(graph, DAMPING, teleport_matrix(graph, [
+        [seed] for seed in seeds
+    ]))
+    for k, seed in enumerate(seeds):
+        print(f"Personalized PageRank for {seed}")
+        for i in np.argsort(-ranks[:, k])[:TOP]:
+            print(f"  {graph.pages[i]}: {ranks[i, k]:.4f}")
+        approximate = push_pagerank(graph, DAMPING, [seed])
+        print(f"Push approximation touched {len(approximate)} pages")
+        for page in sorted(approximate, key=approximate.get,
+                           reverse=True)[:TOP]:
+            print(f"  {page}: {approximate[page]:.4f}")
+
+
+def seed_indices(index, seeds):
+    """
+    Return the indices of the distinct pages in `seeds`, given the index
+    of every page, raising ValueError if there are none or any is not
+    a page.
+    """
+    if not seeds:
+        raise ValueError("empty seed set")
+    for page in seeds:
+        if page not in index:
+            raise ValueError(f"unknown page: {page}")
+    return list(dict.fromkeys(index[page] for page in seeds))
+
+
+def teleport_matrix(graph, seed_sets):
+    """
+    Return the N x K matrix whose column k jumps uniformly to the pages
+    in seed_sets[k], such as the pages about one topic.
+    """
+    index = {page: i for i, page in enumerate(graph.pages)}
+    teleport = np.zeros((len(graph.pages), len(seed_sets)))
+    for k, seeds in enumerate(seed_sets):
+        rows = seed_indices(index, seeds)
+        teleport[rows, k] = 1 / len(rows)
+    return teleport
+
+
+def personalized_pagerank(graph, damping_factor, teleport,
+                          tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Return the N x K matrix whose column k is the PageRank of `graph` when
+    a surfer who does not follow a link jumps to page i with probability
+    teleport[i, k] instead of to any page. Pages with no links are
+    treated as linking according to the same teleport column.
+
+    All K columns are iterated together, so each pass over the links
+    updates every column, until no column's ranks move by more than
+    `tolerance` in L1 distance.
+    """
+    teleport = np.asarray(teleport, dtype=float)
+    if (teleport < 0).any() or not (teleport.sum(axis=0) > 0).all():
+        raise ValueError("teleport columns must be nonnegative and nonzero")
+    teleport = teleport / teleport.sum(axis=0)
+    out_degree = graph.out_degree
+    dangling = out_degree == 0
+    share = np.divide(1.0, out_degree, out=np.zeros(len(out_degree)),
+                      where=out_degree > 0)
+
+    # Pages with incoming links, and where their links start in in_indices
+    linked = np.flatnonzero(np.diff(graph.in_indptr))
+    starts = graph.in_indptr[linked]
+
+    ranks = teleport.copy()
+    for _ in range(max_iterations):
+        incoming = np.zeros_like(ranks)
+        if len(linked):
+            sent = (ranks * share[:, None])[graph.in_indices]
+            incoming[linked] = np.add.reduceat(sent, starts, axis=0)
+        updated = (1 - damping_factor) * teleport + damping_factor * (
+            incoming + teleport * ranks[dangling].sum(axis=0))
+        residual = np.abs(updated - ranks).sum(axis=0).max()
+        ranks = updated
+        if residual < tolerance:
+            break
+    return ranks
+
+
+def push_pagerank(graph, damping_factor, seeds, epsilon=EPSILON):
+    """
+    Return approximate personalized PageRank values for a surfer who
+    jumps uniformly to the pages in `seeds`, as a dictionary of only the
+    pages reached.
+
+    Each page holds an estimate and a residual of rank not yet assigned.
+    Pushing a page moves (1 - damping_factor) of its residual into its
+    estimate and spreads the rest over its links (or back to the seeds,
+    for a page without links). Only pages whose residual is at least
+    `epsilon` per link are pushed, so the work depends on `epsilon` and
+    not on the size of the graph.
+    """
+    index = {page: i for i, page in enumerate(graph.pages)}
+    seeds = seed_indices(index, seeds)
+    estimate = dict()
+    residual = {seed: 1 / len(seeds) for seed in seeds}
+    queue = deque(seeds)
+    queued = set(seeds)
+
+    def threshold(i):
+        return epsilon * max(graph.out_degree[i], 1)
+
+    while queue:
+        i = queue.popleft()
+        queued.discard(i)
+        mass = residual.pop(i, 0.0)
+        estimate[i] = estimate.get(i, 0.0) + (1 - damping_factor) * mass
+        start, end = graph.out_indptr[i], graph.out_indptr[i + 1]
+        if end > start:
+            targets = graph.out_indices[start:end].tolist()
+        else:
+            targets = seeds
+        share = damping_factor * mass / len(targets)
+        for j in targets:
+            residual[j] = residual.get(j, 0.0) + share
+            if j not in queued and residual[j] >= threshold(j):
+                queue.append(j)
+                queued.add(j)
+    return {graph.pages[i]: rank for i, rank in estimate.items()}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import time
+from collections import namedtuple
+from multiprocessing import Pool
+
+import numpy as np
+
+# Largest L1 distance between successive rank vectors at convergence
+TOLERANCE = 1e-10
+
+# Give up on converging after this many iterations
+MAX_ITERATIONS = 1000
+
+# Methods power_iteration can use to update ranks
+SOLVERS = ("jacobi", "gauss-seidel", "quadratic", "adaptive")
+
+# Plain iterations between quadratic extrapolations
+EXTRAPOLATION_PERIOD = 8
+
+# The adaptive solver freezes pages whose rank changes by less than this
+# many times the tolerance, relative to the rank, and recomputes every
+# page after this many iterations with frozen pages
+FREEZE_FACTOR = 100
+ADAPTIVE_PERIOD = 10
+
+# Number of random surfers advanced together by walk_pagerank
+WALKERS = 4096
+
+# Steps taken by all walkers between counting their visits
+STEPS_PER_BLOCK = 64
+
+# A link graph in compressed sparse row form, indexed by destination:
+# the pages linking to pages[i] are pages[j] for j in
+# in_indices[in_indptr[i]:in_indptr[i + 1]]. `rows` repeats each i once
+# per incoming link, and `out_degree[j]` is the number of links on page j.
+# `out_indptr` and `out_indices` index the same links by source.
+Graph = namedtuple("Graph", [
+    "pages", "in_indptr", "in_indices", "rows", "out_degree",
+    "out_indptr", "out_indices"
+])
+
+
+def build_graph(corpus):
+    """
+    Return the Graph of a corpus as returned by `crawl`, ignoring
+    links to pages outside the corpus.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    sources, targets = [], []
+    for page in pages:
+        for link in corpus[page]:
+            if link in index and link != page:
+                sources.append(index[page])
+                targets.append(index[link])
+    return graph_from_edges(pages, np.array(sources, dtype=np.int64),
+                            np.array(targets, dtype=np.int64))
+
+
+def graph_from_edges(pages, sources, targets):
+    """
+    Return the Graph of `pages` with a link from pages[sources[k]]
+    to pages[targets[k]] for every k.
+    """
+    n = len(pages)
+    order = np.argsort(targets, kind="stable")
+    in_indices = sources[order]
+    rows = targets[order]
+    in_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(targets, minlength=n), out=in_indptr[1:])
+    out_degree = np.bincount(sources, minlength=n)
+    out_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(out_degree, out=out_indptr[1:])
+    out_indices = targets[np.argsort(sources, kind="stable")]
+    return Graph(pages, in_indptr, in_indices, rows, out_degree,
+                 out_indptr, out_indices)
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, initial=None,
+                    solver="jacobi", telemetry=None):
+    """
+    Return the PageRank vector of `graph` by iteration, starting from the
+    rank vector `initial` if given (such as the ranks of a slightly
+    different graph) or from uniform ranks otherwise. Iteration stops once
+    the L1 distance between successive rank vectors is below `tolerance`.
+
+    Pages with no links are treated as linking to every page by spreading
+    their total rank evenly, without materializing those links.
+    `solver` is one of:
+        "jacobi": each iteration is one sparse matrix-vector product, in
+            which every page sends its rank divided by its number of links
+            along each link.
+        "gauss-seidel": pages are updated one at a time, each using the
+            ranks already updated in the same sweep. Fewer iterations,
+            but each is a Python loop over pages.
+        "quadratic": Jacobi iteration, with the last four iterates
+            combined by quadratic extrapolation after every
+            EXTRAPOLATION_PERIOD plain iterations. This removes the error
+            along the slowest-decaying directions, which helps most when
+            the graph has weakly linked clusters of pages.
+        "adaptive": approximate Jacobi iteration in which pages whose
+            rank changes by less than FREEZE_FACTOR * tolerance times their
+            rank are frozen, and only the links into other pages are
+            followed, until every page is recomputed again after
+            ADAPTIVE_PERIOD iterations. Frozen pages may stop short of
+            their final ranks, so the result is typically within about
+            FREEZE_FACTOR * tolerance of the other solvers' rather than
+            within `tolerance`. For the same accuracy, "jacobi" with a
+            looser tolerance has so far been at least as fast.
+
+    If `telemetry` is a list, a dictionary with the "iteration" number,
+    its "residual" and the "seconds" elapsed is appended per iteration.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver: {solver}")
+    n = len(graph.pages)
+    out_degree = graph.out_degree
+    dangling = out_degree == 0
+    share = np.divide(1.0, out_degree, out=np.zeros(n),
+                      where=out_degree > 0)
+    if initial is None:
+        ranks = np.full(n, 1 / n)
+    else:
+        ranks = np.asarray(initial, dtype=float) / np.sum(initial)
+
+    # Iterates since the last extrapolation
+    history = [ranks]
+
+    # Pages recomputed by the adaptive solver, the sources of the links
+    # into them, and each link's target as a position in `rows`
+    everyone = np.arange(n)
+    rows, sources, positions = everyone, graph.in_indices, graph.rows
+    last_full = 0
+
+    start = time.perf_counter()
+    for iteration in range(1, max_iterations + 1):
+        if solver == "gauss-seidel":
+            updated = gauss_seidel_sweep(graph, damping_factor, ranks,
+                                         share, dangling)
+        else:
+            incoming = np.bincount(positions,
+                                   weights=(ranks * share)[sources],
+                                   minlength=len(rows))
+            fresh = (1 - damping_factor) / n + damping_factor * (
+                incoming + ranks[dangling].sum() / n)
+            if len(rows) == n:
+                updated = fresh
+            else:
+                updated = ranks.copy()
+                updated[rows] = fresh
+
+        if solver == "quadratic":
+            history.append(updated)
+            if len(history) > EXTRAPOLATION_PERIOD:
+                updated = quadratic_extrapolation(*history[-4:])
+                history = [updated]
+        elif solver == "adaptive":
+            if len(rows) == n:
+                last_full = iteration
+            if iteration - last_full >= ADAPTIVE_PERIOD:
+                rows = everyone
+                sources, positions = graph.in_indices, graph.rows
+            else:
+
+                # Only drop the links of settled pages once there are
+                # enough of them to be worth the copy
+                settled = np.abs(updated[rows] - ranks[rows]) <= (
+                    FREEZE_FACTOR * tolerance * updated[rows])
+                if settled.sum() > len(rows) // 10:
+                    rows = rows[~settled]
+                    sources, positions = links_into(graph, rows)
+
+        residual = np.abs(updated - ranks).sum()
+        ranks = updated
+        if telemetry is not None:
+            telemetry.append({
+                "iteration": iteration,
+                "residual": float(residual),
+                "seconds": time.perf_counter() - start
+            })
+        if residual < tolerance:
+            break
+    return ranks
+
+
+def links_into(graph, rows):
+    """
+    Return the sources of the links into the pages `rows`, and the
+    position in `rows` of each link's target.
+    """
+    starts = graph.in_indptr[rows]
+    counts = graph.in_indptr[rows + 1] - starts
+    offsets = np.cumsum(counts) - counts
+    edges = np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+    return graph.in_indices[edges], np.repeat(np.arange(len(rows)), counts)
+
+
+def gauss_seidel_sweep(graph, damping_factor, ranks, share, dangling):
+    """
+    Return the ranks after updating every page in turn from the latest
+    ranks of the pages linking to it.
+    """
+    n = len(ranks)
+    base = (1 - damping_factor) / n
+    updated = ranks.tolist()
+    share = share.tolist()
+    indptr = graph.in_indptr.tolist()
+    indices = graph.in_indices.tolist()
+    is_dangling = dangling.tolist()
+    dangling_total = float(ranks[dangling].sum())
+    for i in range(n):
+        incoming = 0.0
+        for j in indices[indptr[i]:indptr[i + 1]]:
+            incoming += updated[j] * share[j]
+        rank = base + damping_factor * (incoming + dangling_total / n)
+        if is_dangling[i]:
+            dangling_total += rank - updated[i]
+        updated[i] = rank
+    updated = np.array(updated)
+    return updated / updated.sum()
+
+
+def quadratic_extrapolation(x0, x1, x2, x3):
+    """
+    Return an estimate of the limit of four successive rank vectors,
+    assuming their error lies mostly along the two eigenvectors after the
+    PageRank vector (quadratic extrapolation, Kamvar et al. 2003), and
+    keeping the latest value where the estimate would not be positive.
+    """
+    differences = np.column_stack([x1 - x0, x2 - x0])
+    g1, g2 = -np.linalg.lstsq(differences, x3 - x0, rcond=None)[0]
+    extrapolated = (g1 + g2 + 1) * x1 + (g2 + 1) * x2 + x3
+    extrapolated = np.where(extrapolated > 0, extrapolated, x3)
+    return extrapolated / extrapolated.sum()
+
+
+def sparse_pagerank(corpus, damping_factor, **options):
+    """
+    Return PageRank values for each page of `corpus`, like
+    `iterate_pagerank`, computed by `power_iteration` with `options`.
+    """
+    graph = build_graph(corpus)
+    ranks = power_iteration(graph, damping_factor, **options)
+    return dict(zip(graph.pages, ranks.tolist()))
+
+
+def walk(task):
+    """
+    Advance a block of random surfers over a graph, given a tuple
+    (graph, damping_factor, steps, walkers, seed), and return how many
+    times each page was visited.
+    """
+    graph, damping_factor, steps, walkers, seed = task
+    rng = np.random.default_rng(seed)
+    n = len(graph.pages)
+    visits = np.zeros(n, dtype=np.int64)
+    positions = rng.integers(n, size=walkers)
+    history = np.empty((STEPS_PER_BLOCK, walkers), dtype=np.int64)
+    for step in range(steps):
+        history[step % STEPS_PER_BLOCK] = positions
+        if step % STEPS_PER_BLOCK == STEPS_PER_BLOCK - 1 or step == steps - 1:
+            visits += np.bincount(
+                history[:step % STEPS_PER_BLOCK + 1].ravel(), minlength=n)
+
+        # Follow a random link with probability `damping_factor`,
+        # otherwise (or from a page without links) jump anywhere
+        degree = graph.out_degree[positions]
+        follow = np.flatnonzero((rng.random(walkers) < damping_factor)
+                                & (degree > 0))
+        moved = positions[follow]
+        offsets = (rng.random(len(follow)) * degree[follow]).astype(np.int64)
+        jumped = rng.integers(n, size=walkers)
+        jumped[follow] = graph.out_indices[graph.out_indptr[moved] + offsets]
+        positions = jumped
+    return visits
+
+
+def walk_pagerank(graph, damping_factor, samples, walkers=WALKERS,
+                  processes=1, seed=None):
+    """
+    Return PageRank estimates for `graph` from at least `samples` visits
+    of random surfers, like `sample_pagerank`.
+
+    `walkers` surfers are advanced together as NumPy arrays in each of
+    `processes` worker processes. Each worker gets its own random stream
+    spawned from `seed`, so results are reproducible for a given seed
+    and number of processes.
+    """
+    streams = np.random.SeedSequence(seed).spawn(processes)
+    steps = -(-samples // (walkers * processes))
+    tasks = [(graph, damping_factor, steps, walkers, stream)
+             for stream in streams]
+    if processes == 1:
+        visits = walk(tasks[0])
+    else:
+        with Pool(processes) as pool:
+            visits = sum(pool.map(walk, tasks))
+    return visits / visits.sum()
@@ -0,0 +1,185 @@
+import os
+import sys
+
+import numpy as np
+
+from crawler import EDGES_FILE, PAGES_FILE, page_links
+from sparse import graph_from_edges, power_iteration
+
+# Name of the file holding the last computed ranks, one per page
+RANKS_FILE = "ranks.bin"
+
+DAMPING = 0.85
+
+
+def main():
+    if len(sys.argv) < 4:
+        sys.exit("Usage: python store.py store corpus page [page ...]")
+    store = LinkStore(sys.argv[1])
+    corpus = {
+        entry.name for entry in os.scandir(sys.argv[2])
+        if entry.name.endswith(".html")
+    }
+
+    # Re-read each page from the corpus, removing pages that are gone and
+    # keeping only links to pages in the corpus or the store
+    for page in sys.argv[3:]:
+        if page in corpus:
+            links = page_links(os.path.join(sys.argv[2], page))
+            store.set_links(page, {
+                link for link in links
+                if link in corpus or link in store.links
+            })
+        else:
+            store.remove_page(page)
+
+    ranks = store.pagerank(DAMPING)
+    store.save()
+    print(f"PageRank Results for {len(ranks)} pages")
+    for page in sys.argv[3:]:
+        if page in ranks:
+            print(f"  {page}: {ranks[page]:.4f}")
+
+
+class LinkStore():
+    """
+    Link graph kept in a directory, in the format written by
+    crawler.crawl_to_disk, together with the last computed ranks,
+    supporting adding and removing pages and links between runs.
+    """
+
+    def __init__(self, directory):
+        """
+        Load the store in `directory`, or start an empty one.
+        """
+        self.directory = directory
+        self.pages = []
+        self.links = dict()
+        self.ranks = dict()
+        pages_path = os.path.join(directory, PAGES_FILE)
+        if not os.path.exists(pages_path):
+            return
+
+        with open(pages_path) as f:
+            self.pages = [line.rstrip("\n") for line in f]
+        self.links = {page: set() for page in self.pages}
+        edges = np.fromfile(os.path.join(directory, EDGES_FILE),
+                            dtype=np.int32).reshape(-1, 2)
+        for source, target in edges.tolist():
+            self.links[self.pages[source]].add(self.pages[target])
+
+        # Ranks written for a different set of pages are of no use
+        ranks_path = os.path.join(directory, RANKS_FILE)
+        if os.path.exists(ranks_path):
+            ranks = np.fromfile(ranks_path, dtype=np.float64)
+            if len(ranks) == len(self.pages):
+                self.ranks = dict(zip(self.pages, ranks.tolist()))
+
+    def add_page(self, page):
+        """
+        Add a page without links, if not already in the store.
+        """
+        if page not in self.links:
+            self.pages.append(page)
+            self.links[page] = set()
+
+    def remove_page(self, page):
+        """
+        Remove a page and every link to or from it.
+        """
+        if page not in self.links:
+            return
+        del self.links[page]
+        self.pages.remove(page)
+        self.ranks.pop(page, None)
+        for links in self.links.values():
+            links.discard(page)
+
+    def add_link(self, source, target):
+        """
+        Add a link, adding either page if needed.
+        """
+        self.add_page(source)
+        self.add_page(target)
+        if source != target:
+            self.links[source].add(target)
+
+    def remove_link(self, source, target):
+        """
+        Remove a link, if present.
+        """
+        if source in self.links:
+            self.links[source].discard(target)
+
+    def set_links(self, page, links):
+        """
+        Replace the links of a page, as when it has been crawled again.
+        Links to pages not in the store are added as new pages.
+        """
+        self.add_page(page)
+        self.links[page] = set()
+        for link in links:
+            self.add_link(page, link)
+
+    def graph(self):
+        """
+        Return the sparse.Graph of the pages and links in the store.
+        """
+        index = {page: i for i, page in enumerate(self.pages)}
+        sources, targets = [], []
+        for page in self.pages:
+            for link in self.links[page]:
+                sources.append(index[page])
+                targets.append(index[link])
+        return graph_from_edges(list(self.pages),
+                                np.array(sources, dtype=np.int64),
+                                np.array(targets, dtype=np.int64))
+
+    def pagerank(self, damping_factor, **options):
+        """
+        Return PageRank values for every page, starting power iteration
+        from the last computed ranks. New pages start at the average rank.
+        The result becomes the store's ranks.
+
+        Each iteration shrinks the error by about the same factor, so the
+        warm start only skips the iterations a cold start needs to get as
+        close as the old ranks are. After relinking a few pages the first
+        residual is still around 1e-4, and at the default tolerance this
+        saves only a few of the iterations; savings grow as the tolerance
+        is loosened towards the size of the change.
+        """
+        graph = self.graph()
+        initial = None
+        if self.ranks:
+            default = 1 / len(self.pages)
+            initial = [self.ranks.get(page, default) for page in self.pages]
+        ranks = power_iteration(graph, damping_factor, initial=initial,
+                                **options)
+        self.ranks = dict(zip(self.pages, ranks.tolist()))
+        return self.ranks
+
+    def save(self):
+        """
+        Write the pages, links and ranks to the store's directory.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, PAGES_FILE), "w") as f:
+            for page in self.pages:
+                f.write(page + "\n")
+
+        index = {page: i for i, page in enumerate(self.pages)}
+        edges = [(index[page], index[link])
+                 for page in self.pages for link in self.links[page]]
+        np.array(edges, dtype=np.int32).reshape(-1, 2).tofile(
+            os.path.join(self.directory, EDGES_FILE))
+
+        ranks_path = os.path.join(self.directory, RANKS_FILE)
+        if len(self.ranks) == len(self.pages):
+            np.array([self.ranks[page] for page in self.pages],
+                     dtype=np.float64).tofile(ranks_path)
+        elif os.path.exists(ranks_path):
+            os.remove(ranks_path)
+
+
+if __name__ == "__main__":
+    main()